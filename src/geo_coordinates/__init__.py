@@ -0,0 +1,30 @@
+"""
+Geocoding package: adds latitude and longitude of the location addresses to CSV data.
+"""
+
+from src.geo_coordinates.geo_coordinates import (
+    CoordinatesAdder,
+    YandexMap,
+    NominatimOSM,
+    PhotonOSM,
+    MultiServiceGeocoder,
+    GeoCheckOSM,
+    PeliasGeocoder,
+)
+from src.geo_coordinates.geo_multiple_workers import CoordinatesAdderMultiWorker, GeoCheckOSMMulti
+from src.geo_coordinates.geo_async import AsyncGeocoder, NominatimOSMAsync, GeoCheckOSMAsync
+
+__all__ = [
+    "CoordinatesAdder",
+    "YandexMap",
+    "NominatimOSM",
+    "PhotonOSM",
+    "MultiServiceGeocoder",
+    "GeoCheckOSM",
+    "PeliasGeocoder",
+    "CoordinatesAdderMultiWorker",
+    "GeoCheckOSMMulti",
+    "AsyncGeocoder",
+    "NominatimOSMAsync",
+    "GeoCheckOSMAsync",
+]
@@ -0,0 +1,55 @@
+"""
+Module for skipping geocoding services that are currently down.
+
+Classes:
+    :CircuitBreaker: Thread-safe breaker that stops requests to a failing service for a while.
+
+Dependencies:
+    :threading: For sharing the breaker between worker threads.
+    :time: For measuring the open window.
+"""
+
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Thread-safe breaker that stops requests to a failing service for a while.
+
+    After `fail_threshold` consecutive failed requests the breaker opens, and `allow` returns
+    False for the next `reset_after` seconds, so callers skip the service instead of waiting
+    for timeouts. A successful request resets the failure counter.
+    """
+
+    def __init__(self, fail_threshold: int = 5, reset_after: float = 60.0):
+        """
+        :param fail_threshold: Number of consecutive failures that opens the breaker.
+        :param reset_after: Number of seconds the breaker stays open.
+        """
+        self.fail_threshold = fail_threshold
+        self.reset_after = reset_after
+        self._fails = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Checks whether a request to the service may be sent.
+
+        :return: False while the breaker is open, otherwise True.
+        """
+        return time.monotonic() >= self._open_until
+
+    def record_success(self):
+        """Resets the counter of consecutive failures."""
+        with self._lock:
+            self._fails = 0
+
+    def record_failure(self):
+        """Counts a failed request and opens the breaker once the threshold is reached."""
+        with self._lock:
+            self._fails += 1
+            if self._fails >= self.fail_threshold:
+                self._open_until = time.monotonic() + self.reset_after
+                self._fails = 0
@@ -0,0 +1,190 @@
+"""
+Module for adding geographic coordinates to CSV data using asynchronous requests.
+
+Instead of a thread pool, the addresses missing from the cache are requested from one
+event loop over a shared HTTP/2 connection, so many requests can be in flight at once
+without blocking a thread per request.
+
+Classes:
+    :AsyncGeocoder: Abstract base class for geocoders sending requests asynchronously.
+    :NominatimOSMAsync: Handles fetching coordinates using the Nominatim API (OpenStreetMap).
+    :GeoCheckOSMAsync: Handles fetching coordinates using the GeoCheck Photon API (OpenStreetMap).
+
+Dependencies:
+    :asyncio: For running the requests concurrently.
+    :httpx: For making asynchronous HTTP/2 calls to geocoding services.
+    :CoordinatesAdder: Base class for handling the cache and CSV processing.
+"""
+
+import asyncio
+from abc import abstractmethod
+import httpx
+from tqdm import tqdm
+from src.geo_coordinates.geo_coordinates import CoordinatesAdder, json_loads
+
+
+class AsyncGeocoder(CoordinatesAdder):
+    """
+    Abstract base class for geocoders sending requests to the service asynchronously.
+
+    Subclasses may restrict the service load with the class attributes:
+    - `max_concurrency` (int): Maximum number of requests in flight, None for no extra limit.
+    - `request_interval` (float): Delay in seconds before the next request may use the freed slot.
+    """
+
+    max_concurrency = None
+    request_interval = 0.0
+
+    @abstractmethod
+    async def _fetch_async(self, client: httpx.AsyncClient, address: str) -> (float, float):
+        """
+        Requests latitude and longitude of the address from the geocoding service.
+
+        :param client: HTTP client to send the request with.
+        :param address: The address of the location.
+        :return: tuple of (latitude, longitude) if successful, otherwise (None, None).
+        """
+
+    @staticmethod
+    def _client() -> httpx.AsyncClient:
+        """Creates an HTTP/2 client with a keep-alive connection pool."""
+        return httpx.AsyncClient(
+            http2=True,
+            headers={"User-Agent": "geo-coordinates-adder"},
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            timeout=10
+        )
+
+    def _fetch(self, address: str) -> (float, float):
+        async def fetch():
+            async with self._client() as client:
+                return await self._fetch_async(client, address)
+
+        return asyncio.run(fetch())
+
+    async def _fetch_limited(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                             key: str, address: str):
+        """
+        Requests coordinates of the address once a slot of the semaphore is free.
+        Errors are reported and turned into a failed (not cached) result, so one failing
+        request does not abort the others.
+
+        :param client: HTTP client to send the request with.
+        :param semaphore: Semaphore limiting the number of requests in flight.
+        :param key: Normalized address.
+        :param address: The address of the location.
+        :return: tuple of (normalized address, `_fetch_async` result or None on error).
+        """
+        async with semaphore:
+            try:
+                coordinates = await self._fetch_async(client, address)
+            except Exception as e:
+                print(f"Error fetching coordinates for {address}: {e}")
+                coordinates = None
+            await asyncio.sleep(self.request_interval)
+        return key, coordinates
+
+    def _fetch_many(self, misses: dict, max_workers: int):
+        """
+        Requests coordinates of the addresses from the geocoding service concurrently.
+
+        :param misses: dict mapping normalized addresses to the addresses to request.
+        :param max_workers: Maximum number of requests in flight.
+        :return: iterator of (normalized address, (latitude, longitude)) in completion order.
+        """
+        if self.max_concurrency is not None:
+            max_workers = min(max_workers, self.max_concurrency)
+
+        with asyncio.Runner() as runner:
+            client = self._client()
+            semaphore = asyncio.Semaphore(max_workers)
+            pending = {runner.get_loop().create_task(
+                self._fetch_limited(client, semaphore, key, address))
+                for key, address in misses.items()}
+            try:
+                with tqdm(total=len(pending), desc="Geocoding", unit=" address") as pbar:
+                    # Run the event loop until some requests finish and hand their results out
+                    while pending:
+                        done, pending = runner.run(
+                            asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))
+                        pbar.update(len(done))
+                        for task in done:
+                            yield task.result()
+            finally:
+                runner.run(self._close(client, pending))
+
+    @staticmethod
+    async def _close(client: httpx.AsyncClient, tasks: set):
+        """
+        Cancels the unfinished requests and closes the client afterwards.
+
+        :param client: HTTP client the requests are sent with.
+        :param tasks: Unfinished request tasks.
+        :return: None
+        """
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.aclose()
+
+
+class NominatimOSMAsync(AsyncGeocoder):
+    """
+    A utility class for adding coordinates (latitude and longitude) to the data from a CSV file
+    based on the location addresses provided in the first column of the CSV file.
+
+    The class will use the Nominatim API (OpenStreetMap) to obtain coordinates for the addresses.
+    """
+
+    # Nominatim usage policy allows at most one request per second
+    max_concurrency = 1
+    request_interval = 1.0
+
+    async def _fetch_async(self, client: httpx.AsyncClient, address: str) -> (float, float):
+        url = "https://nominatim.openstreetmap.org/search"
+        params = {"q": address, "format": "json", "limit": 1}
+
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = json_loads(response.content)
+
+            if data:
+                return float(data[0]["lat"]), float(data[0]["lon"])
+        except httpx.HTTPError as e:
+            print(f"Nominatim error for {address}: {e}")
+            return None
+        except ValueError as e:
+            print(e)
+
+        return None, None
+
+
+class GeoCheckOSMAsync(AsyncGeocoder):
+    """
+    A utility class for adding coordinates (latitude and longitude) to the data from a CSV file
+    based on the location addresses provided in the first column of the CSV file.
+
+    The class will use the GeoCheck Photon API (OpenStreetMap) to obtain coordinates for the
+    addresses. It is the asynchronous counterpart of `GeoCheckOSMMulti`: the concurrency is
+    bounded by `max_workers` of `add_coordinates_and_save`.
+    """
+
+    async def _fetch_async(self, client: httpx.AsyncClient, address: str) -> (float, float):
+        url = "https://www.ideeslibres.org/GeoCheck/geocoder.php"
+        params = {"q": address, "geocoder": "photon"}
+
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            data = json_loads(response.content)
+
+            if data:
+                return float(data["firstlat"]), float(data["firstlng"])
+        except httpx.HTTPError as e:
+            print(f"Error fetching {address}: {e}")
+            return None
+        except (KeyError, ValueError, TypeError) as e:
+            print(e)
+
+        return None, None
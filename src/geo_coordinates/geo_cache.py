@@ -0,0 +1,123 @@
+"""
+Module for caching geocoding results between runs.
+
+Geocoding services are slow and rate limited, while the same addresses recur both within
+one CSV file and across runs. This module keeps the already resolved coordinates in an
+SQLite database, so every address is requested from the service only once.
+
+Classes:
+    :GeoCache: Persistent address -> (latitude, longitude) cache backed by SQLite.
+
+Functions:
+    :normalize_address: Builds the cache key of an address.
+
+Dependencies:
+    :sqlite3: For storing the cache on disk.
+    :threading: For sharing the cache between worker threads.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# Abbreviations expanded in cache keys, so that e.g. "г. Бор" and "город Бор" share an entry
+_ABBREVIATIONS = {
+    "г": "город",
+    "ул": "улица",
+    "обл": "область",
+    "р-н": "район",
+    "мкр": "микрорайон",
+    "пер": "переулок",
+    "кв": "квартира",
+}
+_ABBREVIATION_RE = re.compile(
+    r"(?<!\w)(" + "|".join(map(re.escape, _ABBREVIATIONS)) + r")(?!\w)\.?"
+)
+
+
+def normalize_address(address: str) -> str:
+    """
+    Builds the cache key of the address: Unicode NFKC form in lowercase with expanded
+    abbreviations, uniform spacing and without trailing punctuation.
+
+    :param address: The address of the location.
+    :return: Normalized address.
+    """
+    key = unicodedata.normalize("NFKC", address).lower()
+    key = _ABBREVIATION_RE.sub(lambda match: _ABBREVIATIONS[match[1]] + " ", key)
+    key = re.sub(r"\s*([,;])\s*", r"\1 ", key)
+    return re.sub(r"\s+", " ", key).strip(" .,;")
+
+
+class GeoCache:
+    """
+    Persistent cache of geocoding results stored in an SQLite database.
+
+    Failed lookups are cached as well (with NULL coordinates), so known-bad addresses
+    do not hit the geocoding service again. Entries older than `ttl` are dropped on startup,
+    so the addresses are eventually geocoded again. All other entries are loaded into memory,
+    so lookups never touch the database. The cache may be shared between threads.
+    """
+
+    def __init__(self, filepath: str, commit_every: int = 100, ttl: int = 30 * 24 * 60 * 60):
+        """
+        :param filepath: Path to the SQLite database file. It is created if it does not exist.
+        :param commit_every: Number of inserted entries after which the changes are committed.
+        :param ttl: Number of seconds an entry stays valid, None to keep entries forever.
+        """
+        self.filepath = filepath
+        self.commit_every = commit_every
+        self.ttl = ttl
+        self._pending = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filepath, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS geo(addr TEXT PRIMARY KEY, lat REAL, lon REAL, ts INTEGER)"
+        )
+        if ttl is not None:
+            self._connection.execute("DELETE FROM geo WHERE ts < ?", (int(time.time()) - ttl,))
+        self._connection.commit()
+        self._entries = {addr: (lat, lon) for addr, lat, lon
+                         in self._connection.execute("SELECT addr, lat, lon FROM geo")}
+
+    def get(self, key: str):
+        """
+        Looks up cached coordinates.
+
+        :param key: Normalized address.
+        :return: tuple of (latitude, longitude), (None, None) for a cached failed lookup,
+                 or None if the address is not cached.
+        """
+        return self._entries.get(key)
+
+    def set(self, key: str, latitude: float, longitude: float):
+        """
+        Stores coordinates of the address. The changes are committed in batches.
+
+        :param key: Normalized address.
+        :param latitude: Latitude of the address or None if the lookup failed.
+        :param longitude: Longitude of the address or None if the lookup failed.
+        :return: None
+        """
+        with self._lock:
+            self._entries[key] = (latitude, longitude)
+            self._connection.execute("INSERT OR REPLACE INTO geo VALUES (?, ?, ?, ?)",
+                                     (key, latitude, longitude, int(time.time())))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._connection.commit()
+                self._pending = 0
+
+    def flush(self):
+        """Commits all pending changes to the database."""
+        with self._lock:
+            self._connection.commit()
+            self._pending = 0
+
+    def close(self):
+        """Commits pending changes and closes the database connection."""
+        self.flush()
+        self._connection.close()
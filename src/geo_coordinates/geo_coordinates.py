@@ -2,26 +2,53 @@
 Module for adding geographic coordinates to CSV data based on location addresses.
 
 This module reads location data from a CSV file, fetches latitude and longitude coordinates
-for each location using either the Yandex Geocoding API or the Nominatim API (OpenStreetMap),
-and writes the enriched data into a new CSV file.
+for each location using one of the supported geocoding services, and writes the enriched
+data into a new CSV file.
 
 Classes:
     :CoordinatesAdder: Abstract base class for handling coordinate fetching and CSV processing.
     :YandexMap: Handles fetching coordinates using the Yandex Geocoding API.
     :NominatimOSM: Handles fetching coordinates using the Nominatim API (OpenStreetMap).
+    :PhotonOSM: Handles fetching coordinates using the geocode.xyz API.
+    :MultiServiceGeocoder: Tries Nominatim, geocode.xyz and Geocode.maps.co in turn.
+    :GeoCheckOSM: Handles fetching coordinates using the GeoCheck Photon API (OpenStreetMap).
+    :PeliasGeocoder: Handles fetching coordinates using a Pelias instance.
 
 Dependencies:
     :csv: For reading and writing CSV files.
     :requests: For making API calls to geocoding services.
-    :CsvReader: Utility class for reading CSV data.
+    :orjson: For fast parsing of API responses (optional, falls back to json).
+    :ijson: For reading only the needed part of Yandex responses (optional).
+    :GeoCache: Persistent cache of already geocoded addresses.
+    :RateLimiter: For keeping requests within the usage policies of the services.
+    :CircuitBreaker: For skipping services that are currently down.
 """
 
 import csv
+import os
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 from tqdm import tqdm  # Импортируем tqdm для прогресс-бара
-
+from src.geo_coordinates.geo_cache import GeoCache, normalize_address
+from src.geo_coordinates.rate_limiter import RateLimiter
+from src.geo_coordinates.circuit_breaker import CircuitBreaker
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    import ijson
+    _JSON_ERRORS = (ValueError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    _JSON_ERRORS = (ValueError,)
 
 class CoordinatesAdder(ABC):
     """
@@ -29,37 +56,213 @@ class CoordinatesAdder(ABC):
 
     The CSV file should have the following format:
         hospital_num, history_num, location, ...
+
+    Services able to geocode several addresses in one request override `_fetch_batch`
+    and set `batch_size` to the number of addresses sent at once.
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    batch_size = 1
+
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None):
         """
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
+                               Defaults to `geo_cache_<class name>.sqlite` next to the output
+                               file, so the results of different services are never mixed.
         """
         self.input_filepath = input_filepath
         self.output_filepath = output_filepath
+        self.debug = False      # Whether to print every written row.
+        self.encoding = "cp1251"    # Encoding of the input and output CSV files.
+
+        if cache_filepath is None:
+            cache_filepath = os.path.join(os.path.dirname(output_filepath),
+                                          f"geo_cache_{type(self).__name__}.sqlite")
+        self.cache = GeoCache(cache_filepath)
+
+        # Keep-alive session shared by all requests, so the TCP/TLS handshake is done once per host
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "geo-coordinates-adder"
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)  # Self-hosted services are often plain HTTP
+
+    def _mount_rate_limited(self, prefix: str):
+        """
+        Mounts an adapter that does not resend error responses (e.g. 429 or 503) for the
+        URLs starting with the prefix. Such retries would bypass the rate limiter of the
+        service, so the failed address is left uncached and requested again on the next run.
+
+        :param prefix: URL prefix of the rate-limited service.
+        :return: None
+        """
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[])
+        self.session.mount(prefix, HTTPAdapter(max_retries=retries))
+
+    def close(self):
+        """
+        Commits the pending cache entries and closes the cache and the HTTP session.
+        Results of `get_coordinates` calls are only guaranteed to be saved after closing.
+
+        :return: None
+        """
+        self.cache.close()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _normalize(address: str) -> str:
+        """
+        Builds the cache key of the address: Unicode NFKC form in lowercase with expanded
+        abbreviations, uniform spacing and without trailing punctuation.
+
+        The key is only used for the cache, the original address is sent to the service.
+
+        :param address: The address of the location.
+        :return: Normalized address.
+        """
+        return normalize_address(address)
 
-    @abstractmethod
     def get_coordinates(self, address: str) -> (float, float):
         """
-        Gets latitude and longitude from Yandex Geocoding API based on the address.
+        Gets latitude and longitude based on the address. Cached results are returned
+        without querying the geocoding service.
 
         :param address: The address of the location.
         :return: tuple of (latitude, longitude) if successful, otherwise (None, None).
         """
+        key = self._normalize(address)
+        coordinates = self.cache.get(key)
+        if coordinates is None:
+            coordinates = self._fetch(address)
+            if coordinates is None:
+                return None, None
+            self.cache.set(key, *coordinates)
+        return coordinates
+
+    def get_coordinates_batch(self, addresses: list, max_workers: int = 8) -> list:
+        """
+        Gets latitude and longitude of several addresses. Cached results are returned
+        without querying the geocoding service.
+
+        :param addresses: List of addresses of the locations.
+        :param max_workers: Number of threads sending requests to the geocoding service.
+        :return: list of tuples of (latitude, longitude) in the order of the addresses.
+        """
+        coordinates = self._geocode_unique(set(addresses), max_workers)
+        return [coordinates[address] for address in addresses]
+
+    @abstractmethod
+    def _fetch(self, address: str) -> (float, float):
+        """
+        Requests latitude and longitude of the address from the geocoding service.
+
+        :param address: The address of the location.
+        :return: tuple of (latitude, longitude) if successful, (None, None) if the service
+                 found nothing. None if the service was skipped (e.g. by the circuit breakers
+                 of MultiServiceGeocoder) or the request failed, such results are not cached.
+        """
+
+    def _fetch_batch(self, addresses: list) -> list:
+        """
+        Requests coordinates of several addresses from the geocoding service.
+        By default, the addresses are requested one by one.
+
+        :param addresses: List of addresses of the locations.
+        :return: list of `_fetch` results in the order of the addresses.
+        """
+        return [self._fetch(address) for address in addresses]
+
+    def _geocode_unique(self, addresses: set, max_workers: int) -> dict:
+        """
+        Gets coordinates of the addresses. Addresses with the same normalized form are
+        requested only once, and cached ones are not requested at all.
 
-    def add_coordinates_and_save(self):
+        :param addresses: Set of addresses of the locations.
+        :param max_workers: Number of threads sending requests to the geocoding service.
+        :return: dict mapping each address to a tuple of (latitude, longitude).
+        """
+        keys = {address: self._normalize(address) for address in addresses}
+
+        # Resolve addresses from the cache, the rest is requested from the service
+        results = {}
+        misses = {}
+        for address, key in keys.items():
+            if key in results or key in misses:
+                continue
+            cached = self.cache.get(key)
+            if cached is None:
+                misses[key] = address
+            else:
+                results[key] = cached
+
+        try:
+            for key, coordinates in self._fetch_many(misses, max_workers):
+                if coordinates is None:
+                    coordinates = None, None
+                else:
+                    self.cache.set(key, *coordinates)
+                results[key] = coordinates
+        finally:
+            self.cache.flush()
+
+        return {address: results[key] for address, key in keys.items()}
+
+    def _fetch_many(self, misses: dict, max_workers: int):
+        """
+        Requests coordinates of the addresses from the geocoding service in a thread pool.
+
+        :param misses: dict mapping normalized addresses to the addresses to request.
+        :param max_workers: Number of threads sending requests to the geocoding service.
+        :return: iterator of (normalized address, (latitude, longitude)) in completion order.
+                 The coordinates are None for the addresses whose request raised an error.
+        """
+        items = list(misses.items())
+        chunks = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+        with (ThreadPoolExecutor(max_workers=max_workers) as executor,
+              tqdm(total=len(items), desc="Geocoding", unit=" address") as pbar):
+            future_to_keys = {
+                executor.submit(self._fetch_batch, [address for _, address in chunk]):
+                    [key for key, _ in chunk]
+                for chunk in chunks
+            }
+            for future in as_completed(future_to_keys):
+                keys = future_to_keys[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # A failed chunk must not abort the whole run, its addresses are not cached
+                    print(f"Error fetching coordinates for {[misses[key] for key in keys]}: {e}")
+                    results = [None] * len(keys)
+                yield from zip(keys, results)
+                pbar.update(len(keys))
+
+    def add_coordinates_and_save(self, max_workers: int = 8):
         """
         Reads the data from the CSV file, adds coordinates to each location,
         and writes the data with coordinates to a new CSV file.
 
+        Addresses missing from the cache are geocoded in parallel, each unique address once.
+        The files are read and written in `self.encoding` (Windows-1251 by default); undecodable
+        bytes are replaced instead of aborting the run.
+
+        :param max_workers: Number of threads sending requests to the geocoding service.
         :return: None
         """
         # Open the output file for writing
-        with (open(self.input_filepath, mode='r', encoding='ANSI') as input_file, \
-              open(self.output_filepath, mode='w', newline='', encoding='ANSI')
-              as output_file):
+        with (open(self.input_filepath, mode='r', encoding=self.encoding, errors='replace',
+                   buffering=1 << 20) as input_file, \
+              open(self.output_filepath, mode='w', newline='', encoding=self.encoding,
+                   errors='ignore', buffering=1 << 20) as output_file):
             reader = csv.reader(input_file, delimiter=';')
             writer = csv.writer(output_file, delimiter=';')
 
@@ -67,15 +270,38 @@ class CoordinatesAdder(ABC):
             header = next(reader)
             writer.writerow(["latitude", "longitude"] + header)
 
-            for row in tqdm(reader, desc="Processing", unit=" row"):
-                hospital_num, history_num,  location, *_ = row
-                latitude, longitude = self.get_coordinates(location)
+            # Geocode every unique address once, rows without an address are not geocoded
+            coordinates = self._geocode_unique({row[2] for row in reader if row[2].strip()},
+                                               max_workers)
+
+            # Read the file once more and broadcast the results to the rows
+            input_file.seek(0)
+            reader = csv.reader(input_file, delimiter=';')
+            next(reader)  # Skip header
+
+            writer.writerows(self._with_coordinates(reader, coordinates))
+
+    def _with_coordinates(self, rows, coordinates: dict):
+        """
+        Adds coordinates of the location to the beginning of each row.
 
-                # Add coordinates to the beginning of the row
-                new_row = [latitude, longitude] + row
-                writer.writerow(new_row)
-                print(f"\n{hospital_num}, {history_num}: {new_row}")
-                time.sleep(1)
+        :param rows: Iterable of CSV rows.
+        :param coordinates: dict mapping each address to a tuple of (latitude, longitude).
+                            Rows with a missing address get (None, None).
+        :return: iterator of rows with latitude and longitude in the first two columns.
+        """
+        # Consecutive rows often share the address, so the previous lookup is reused
+        last_location, last_coordinates = None, (None, None)
+        for row in rows:
+            hospital_num, history_num, location, *_ = row
+            if location != last_location:
+                last_location = location
+                last_coordinates = coordinates.get(location, (None, None))
+
+            new_row = [*last_coordinates, *row]
+            if self.debug:
+                print(f"{hospital_num}, {history_num}: {new_row}")
+            yield new_row
 
 
 class YandexMap(CoordinatesAdder):
@@ -86,19 +312,24 @@ class YandexMap(CoordinatesAdder):
     The class will use the Yandex Geocoding API to obtain coordinates for the addresses.
     """
 
-    def __init__(self, api_key: str, input_filepath: str, output_filepath: str):
+    # Path to the coordinates of the features in the response, as understood by ijson
+    _POS_PREFIX = "response.GeoObjectCollection.featureMember.item.GeoObject.Point.pos"
+
+    def __init__(self, api_key: str, input_filepath: str, output_filepath: str,
+                 cache_filepath: str = None):
         """
         :param api_key: API key for Yandex Geocoding API.
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
         """
-        super().__init__(input_filepath, output_filepath)
+        super().__init__(input_filepath, output_filepath, cache_filepath)
         self.api_key = api_key
 
-    def get_coordinates(self, address: str) -> (float, float):
+    def _fetch(self, address: str) -> (float, float):
         """
-        Gets latitude and longitude from Yandex Geocoding API based on the address.
+        Requests latitude and longitude from Yandex Geocoding API based on the address.
 
         :param address: The address of the location.
         :return: tuple of (latitude, longitude) if successful, otherwise (None, None).
@@ -111,21 +342,28 @@ class YandexMap(CoordinatesAdder):
         }
 
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()  # Raise an exception for bad status codes
-            data = response.json()
 
-            # Check if there are any results
-            if data["response"]["GeoObjectCollection"]["featureMember"]:
+            if ijson is not None:
+                # Parse the response only up to the coordinates of the first feature
+                coordinates = next(ijson.items(response.content, self._POS_PREFIX), None)
+            else:
+                data = json_loads(response.content)
+                feature_member = data["response"]["GeoObjectCollection"]["featureMember"]
                 # Get the coordinates of the first feature in the response
-                coordinates = \
-                    data["response"]["GeoObjectCollection"]["featureMember"][0]["GeoObject"][
-                        "Point"][
-                        "pos"]
+                coordinates = feature_member[0]["GeoObject"]["Point"]["pos"] \
+                    if feature_member else None
+
+            # Check if there are any results
+            if coordinates:
                 latitude, longitude = coordinates.split()
                 return float(latitude), float(longitude)
             return None, None
         except requests.RequestException as e:
+            print(f"Error fetching coordinates for {address}: {e}")
+            return None
+        except _JSON_ERRORS as e:
             print(f"Error fetching coordinates for {address}: {e}")
             return None, None
 
@@ -138,37 +376,50 @@ class NominatimOSM(CoordinatesAdder):
     The class will use the Nominatim API (OpenStreetMap) to obtain coordinates for the addresses.
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None,
+                 base_url: str = "https://nominatim.openstreetmap.org", rate_limit: float = 1.0):
         """
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
+        :param base_url: URL of the Nominatim instance, the public one by default.
+        :param rate_limit: Maximum number of requests per second. The usage policy of the public
+                           instance allows 1; pass None when using a local instance to send
+                           requests without any delay.
         """
-        super().__init__(input_filepath, output_filepath)
-
-    def get_coordinates(self, address: str) -> (float, float):
-        url = "https://nominatim.openstreetmap.org/search"
+        super().__init__(input_filepath, output_filepath, cache_filepath)
+        self.base_url = base_url.rstrip("/")
+        self._nominatim_rl = RateLimiter(rate_limit) if rate_limit else None
+        if self._nominatim_rl is not None:
+            self._mount_rate_limited(f"{self.base_url}/")
+
+    def _fetch(self, address: str) -> (float, float):
+        url = f"{self.base_url}/search"
         params = {
             "q": address,
             "format": "json",
             "limit": 2
         }
 
-        for attempt in range(3):
-            try:
-                response = requests.get(url, params=params,
-                                        headers={"User-Agent": "geo-coordinates-adder"}, timeout=6)
-                response.raise_for_status()
-                data = response.json()
+        # Transient errors are retried by the session adapter, unless the requests are paced
+        try:
+            if self._nominatim_rl is not None:
+                self._nominatim_rl.acquire()
+            response = self.session.get(url, params=params, timeout=6)
+            response.raise_for_status()
+            data = json_loads(response.content)
 
-                if data:
-                    latitude = float(data[0]["lat"])
-                    longitude = float(data[0]["lon"])
-                    return latitude, longitude
+            if data:
+                latitude = float(data[0]["lat"])
+                longitude = float(data[0]["lon"])
+                return latitude, longitude
 
-            except requests.RequestException as e:
-                print(f"Attempt {attempt + 1}: Error fetching coordinates for {address}: {e}")
-                time.sleep(1)
+        except requests.RequestException as e:
+            print(f"Error fetching coordinates for {address}: {e}")
+            return None
+        except ValueError as e:
+            print(f"Error fetching coordinates for {address}: {e}")
 
         return None, None
 
@@ -181,30 +432,33 @@ class PhotonOSM(CoordinatesAdder):
     The class will use the Photon API (OpenStreetMap) to obtain coordinates for the addresses.
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None):
         """
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
         """
-        super().__init__(input_filepath, output_filepath)
+        super().__init__(input_filepath, output_filepath, cache_filepath)
 
-    def get_coordinates(self, address: str) -> (float, float):
+    def _fetch(self, address: str) -> (float, float):
         url = f"https://geocode.xyz/{address}"
         params = {"json": 1}
 
-        for attempt in range(3):
-            try:
-                response = requests.get(url, params=params, timeout=6)
-                response.raise_for_status()
-                data = response.json()
+        # Transient errors are already retried by the session adapter
+        try:
+            response = self.session.get(url, params=params, timeout=6)
+            response.raise_for_status()
+            data = json_loads(response.content)
 
-                if "latt" in data and "longt" in data:
-                    return float(data["latt"]), float(data["longt"])
+            if "latt" in data and "longt" in data:
+                return float(data["latt"]), float(data["longt"])
 
-            except requests.RequestException as e:
-                print(f"Error fetching coordinates for {address}: {e}")
-                time.sleep(1)
+        except requests.RequestException as e:
+            print(f"Error fetching coordinates for {address}: {e}")
+            return None
+        except ValueError as e:
+            print(f"Error fetching coordinates for {address}: {e}")
 
         return None, None
 
@@ -215,77 +469,98 @@ class MultiServiceGeocoder(CoordinatesAdder):
     It first tries Yandex, then Nominatim, and finally Photon.
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    GEOCODE_MAPS_CO_DAILY_QUOTA = 4800
+
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None):
         """
         :param yandex_api_key: API key for Yandex Geocoding API.
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
         """
-        super().__init__(input_filepath, output_filepath)
-
-    @staticmethod
-    def get_coordinates_nominatim(address: str) -> (float, float):
-        """Gets coordinates using Nominatim OSM."""
+        super().__init__(input_filepath, output_filepath, cache_filepath)
+        # Nominatim usage policy allows at most one request per second
+        self._nominatim_rl = RateLimiter(1.0)
+        self._mount_rate_limited("https://nominatim.openstreetmap.org/")
+        self._nominatim_breaker = CircuitBreaker()
+        self._photon_breaker = CircuitBreaker()
+        self._geocode_maps_co_breaker = CircuitBreaker()
+
+        # Number of requests sent to Geocode.maps.co, shared by the worker threads
+        self._gmc_count = 0
+        self._gmc_lock = threading.Lock()
+
+    def get_coordinates_nominatim(self, address: str) -> (float, float):
+        """Gets coordinates using Nominatim OSM, None if the request failed."""
         url = "https://nominatim.openstreetmap.org/search"
         params = {"q": address, "format": "json", "limit": 1}
 
         try:
-            response = requests.get(url, params=params, headers={"User-Agent": "geo-coordinates-adder"}, timeout=6)
+            self._nominatim_rl.acquire()
+            response = self.session.get(url, params=params, timeout=6)
             response.raise_for_status()
-            data = response.json()
+            self._nominatim_breaker.record_success()
+            data = json_loads(response.content)
 
             if data:
                 return float(data[0]["lat"]), float(data[0]["lon"])
         except requests.RequestException as e:
+            self._nominatim_breaker.record_failure()
             print(f"Nominatim error for {address}: {e}")
+            return None
         except ValueError as e:
             print(e)
 
         return None, None
 
-    @staticmethod
-    def get_coordinates_photon(address: str) -> (float, float):
-        """Gets coordinates using Photon API."""
+    def get_coordinates_photon(self, address: str) -> (float, float):
+        """Gets coordinates using Photon API, None if the request failed."""
         url = f"https://geocode.xyz/{address}"
         params = {"json": 1}
 
         try:
-            response = requests.get(url, params=params, timeout=6)
+            response = self.session.get(url, params=params, timeout=6)
             response.raise_for_status()
-            data = response.json()
+            self._photon_breaker.record_success()
+            data = json_loads(response.content)
 
             if "latt" in data and "longt" in data:
                 return float(data["latt"]), float(data["longt"])
         except requests.RequestException as e:
+            self._photon_breaker.record_failure()
             print(f"Photon error for {address}: {e}")
+            return None
         except ValueError as e:
             print(e)
 
         return None, None
 
-    @staticmethod
-    def get_coordinates_GeocodeMapsCo(address: str) -> (float, float):
+    def get_coordinates_geocode_maps_co(self, address: str) -> (float, float):
         """
-        Получает широту и долготу из Geocode.maps.co на основе адреса.
+        Gets coordinates using Geocode.maps.co.
 
-        :param address: Адрес местоположения.
-        :return: Кортеж (широта, долгота) при успешном получении, иначе (None, None).
+        :param address: The address of the location.
+        :return: tuple of (latitude, longitude) if successful, otherwise (None, None).
+                 None if the daily quota is exhausted and the service was not asked,
+                 or if the request failed.
         """
         url = "https://geocode.maps.co/search"
         params = {
             "q": address,
             "api_key": "api_key"
         }
-        global currGeocodeMapsCo
-        if currGeocodeMapsCo > 4800:
-            print(f"GeocodeMapsCo error for {address}: {e}")
-            return
+        with self._gmc_lock:
+            if self._gmc_count >= self.GEOCODE_MAPS_CO_DAILY_QUOTA:
+                print("GeocodeMapsCo daily quota exhausted")
+                return None
+            self._gmc_count += 1
+
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            currGeocodeMapsCo = currGeocodeMapsCo + 1
-            data = response.json()
+            self._geocode_maps_co_breaker.record_success()
+            data = json_loads(response.content)
 
             if data:
                 latitude = float(data[0]["lat"])
@@ -293,22 +568,38 @@ class MultiServiceGeocoder(CoordinatesAdder):
                 return latitude, longitude
 
         except requests.RequestException as e:
+            self._geocode_maps_co_breaker.record_failure()
             print(f"GeocodeMapsCo error for {address}: {e}")
+            return None
         except ValueError as e:
             print(e)
 
         return None, None
 
-    def get_coordinates(self, address: str) -> (float, float):
-        """Tries multiple services to get coordinates."""
-        for method in [self.get_coordinates_nominatim, self.get_coordinates_photon, self.get_coordinates_GeocodeMapsCo]:
-            latitude, longitude = method(address)
+    def _fetch(self, address: str) -> (float, float):
+        """Tries multiple services to get coordinates, skipping the ones that are down."""
+        services = [(self._nominatim_breaker, self.get_coordinates_nominatim),
+                    (self._photon_breaker, self.get_coordinates_photon),
+                    (self._geocode_maps_co_breaker, self.get_coordinates_geocode_maps_co)]
+        skipped = False
+        for breaker, method in services:
+            if not breaker.allow():
+                skipped = True
+                continue
+
+            coordinates = method(address)
+            if coordinates is None:
+                skipped = True
+                continue
+
+            latitude, longitude = coordinates
             if latitude and longitude:
                 return latitude, longitude
 
             time.sleep(1.5)  # Pause to avoid being blocked
 
-        return None, None
+        # Not every service was asked, so the failure must not be cached
+        return None if skipped else (None, None)
 
 
 class GeoCheckOSM(CoordinatesAdder):
@@ -319,29 +610,106 @@ class GeoCheckOSM(CoordinatesAdder):
     The class will use the Photon API (OpenStreetMap) to obtain coordinates for the addresses.
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None):
         """
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
         """
-        super().__init__(input_filepath, output_filepath)
+        super().__init__(input_filepath, output_filepath, cache_filepath)
 
-    def get_coordinates(self, address: str) -> (float, float):
+    def _fetch(self, address: str) -> (float, float):
         url = "https://www.ideeslibres.org/GeoCheck/geocoder.php"
         params = {"q": address, "geocoder": "photon"}
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             if data:
                 latitude = float(data["firstlat"])
                 longitude = float(data["firstlng"])
                 return latitude, longitude
         except requests.RequestException as e:
             print(f"Error fetching {address}: {e}")
+            return None
         except ValueError as e:
             print(f"Value error {address}: {e}")
         except TypeError as e:
             print(f"Type error {address}: {e}")
         return None, None
+
+
+class PeliasGeocoder(CoordinatesAdder):
+    """
+    A utility class for adding coordinates (latitude and longitude) to the data from a CSV file
+    based on the location addresses provided in the first column of the CSV file.
+
+    The class will use a Pelias instance to obtain coordinates for the addresses. If the
+    deployment also exposes a bulk search endpoint, which accepts
+    `{"searches": [{"q": address, "limit": 1}, ...]}` and returns a list of GeoJSON feature
+    collections in the same order, the addresses are sent to it in batches.
+    """
+
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None,
+                 base_url: str = "http://localhost:4000", bulk_url: str = None):
+        """
+        :param input_filepath: Path to the CSV file containing the data.
+        :param output_filepath: Path to the output CSV file where the data
+                                with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
+        :param base_url: URL of the Pelias instance.
+        :param bulk_url: URL of the bulk search endpoint, None if there is none.
+        """
+        super().__init__(input_filepath, output_filepath, cache_filepath)
+        self.base_url = base_url.rstrip("/")
+        self.bulk_url = bulk_url
+        if bulk_url is not None:
+            self.batch_size = 100
+
+    @staticmethod
+    def _parse(collection: dict) -> (float, float):
+        """
+        Gets coordinates of the first feature of a GeoJSON feature collection.
+
+        :param collection: GeoJSON feature collection.
+        :return: tuple of (latitude, longitude) if there are features, otherwise (None, None).
+        """
+        features = collection.get("features")
+        if features:
+            longitude, latitude = features[0]["geometry"]["coordinates"][:2]
+            return float(latitude), float(longitude)
+        return None, None
+
+    def _fetch(self, address: str) -> (float, float):
+        url = f"{self.base_url}/v1/search"
+        params = {"text": address, "size": 1}
+        try:
+            response = self.session.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            return self._parse(json_loads(response.content))
+        except requests.RequestException as e:
+            print(f"Pelias error for {address}: {e}")
+            return None
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Pelias error for {address}: {e}")
+        return None, None
+
+    def _fetch_batch(self, addresses: list) -> list:
+        if self.bulk_url is None:
+            return super()._fetch_batch(addresses)
+
+        payload = {"searches": [{"q": address, "limit": 1} for address in addresses]}
+        try:
+            response = self.session.post(self.bulk_url, json=payload, timeout=60)
+            response.raise_for_status()
+            collections = json_loads(response.content)
+            if len(collections) != len(addresses):
+                raise ValueError(f"expected {len(addresses)} results, got {len(collections)}")
+            return [self._parse(collection) for collection in collections]
+        except requests.RequestException as e:
+            print(f"Pelias bulk error for {len(addresses)} addresses: {e}")
+            return [None] * len(addresses)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Pelias bulk error for {len(addresses)} addresses: {e}")
+        return [(None, None)] * len(addresses)
@@ -1,8 +1,27 @@
-import requests
+"""
+Module for adding geographic coordinates to CSV data using several worker threads.
+
+Classes:
+    :CoordinatesAdderMultiWorker: Abstract base class for geocoding rows in a thread pool.
+    :GeoCheckOSMMulti: Handles fetching coordinates using the GeoCheck Photon API (OpenStreetMap).
+
+Dependencies:
+    :csv: For reading and writing CSV files.
+    :concurrent.futures: For sending requests from several threads.
+    :requests: For making API calls to geocoding services.
+    :GeoCache: Persistent cache of already geocoded addresses.
+"""
+
 import csv
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tqdm import tqdm
+import os
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from tqdm import tqdm
+from src.geo_coordinates.geo_cache import GeoCache, normalize_address
 
 
 class CoordinatesAdderMultiWorker(ABC):
@@ -13,59 +32,229 @@ class CoordinatesAdderMultiWorker(ABC):
         hospital_num, history_num, location, ...
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None):
         """
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
+                               Defaults to `geo_cache_<class name>.sqlite` next to the output
+                               file, so the results of different services are never mixed.
         """
         self.input_filepath = input_filepath
         self.output_filepath = output_filepath
+        self.encoding = "cp1251"    # Encoding of the input and output CSV files.
+        self.debug = False          # Whether to print every written row.
+
+        if cache_filepath is None:
+            cache_filepath = os.path.join(os.path.dirname(output_filepath),
+                                          f"geo_cache_{type(self).__name__}.sqlite")
+        self.cache = GeoCache(cache_filepath)
+
+        # Keep-alive session shared by all workers, so the TCP/TLS handshake is done once
+        # per connection instead of once per request. Responses are gzip-encoded by default.
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "geo-coordinates-adder"
+        self._pool_size = None
+        self._mount_pool(pool_size=5)
+
+    def _mount_pool(self, pool_size: int):
+        """
+        Mounts a connection pool with retries of transient server errors to the session.
+        The previously mounted pool is closed, or kept if it already has the requested size.
+
+        :param pool_size: Number of keep-alive connections kept per host.
+        :return: None
+        """
+        if pool_size == self._pool_size:
+            return
+        if self._pool_size is not None:
+            self.session.adapters["https://"].close()   # The same adapter serves both prefixes
+
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool_size = pool_size
+
+    def close(self):
+        """
+        Commits the pending cache entries and closes the cache and the HTTP session.
+        Results of `get_coordinates` calls are only guaranteed to be saved after closing.
+
+        :return: None
+        """
+        self.cache.close()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-    @abstractmethod
     def get_coordinates(self, address: str) -> (float, float):
         """
-        Gets latitude and longitude from Yandex Geocoding API based on the address.
+        Gets latitude and longitude based on the address. Cached results are returned
+        without querying the geocoding service.
 
         :param address: The address of the location.
         :return: tuple of (latitude, longitude) if successful, otherwise (None, None).
         """
+        key = normalize_address(address)
+        coordinates = self.cache.get(key)
+        if coordinates is None:
+            coordinates = self._fetch(address)
+            if coordinates is None:
+                return None, None
+            self.cache.set(key, *coordinates)
+        return coordinates
+
+    @abstractmethod
+    def _fetch(self, address: str) -> (float, float):
+        """
+        Requests latitude and longitude of the address from the geocoding service.
+
+        :param address: The address of the location.
+        :return: tuple of (latitude, longitude) if successful, (None, None) if the service
+                 found nothing. None if the request failed, such results are not cached.
+        """
+
+    def _submit(self, executor: ThreadPoolExecutor, futures: dict, address: str) -> Future:
+        """
+        Submits geocoding of the address, unless an equal address was already submitted.
+
+        :param executor: Thread pool running the requests.
+        :param futures: dict mapping normalized addresses to the futures of their coordinates.
+        :param address: The address of the location.
+        :return: Future returning the coordinates of the address.
+        """
+        key = normalize_address(address)
+        future = futures.get(key)
+        if future is None:
+            future = futures[key] = executor.submit(self.get_coordinates, address)
+        return future
+
+    def _complete(self, row: list, future: Future) -> list:
+        """
+        Waits for the coordinates of the row and adds them to the beginning of the row.
+
+        :param row: CSV row.
+        :param future: Future returning the coordinates of the row location.
+        :return: row with latitude and longitude in the first two columns.
+        """
+        hospital_num, history_num, location, *_ = row
+        try:
+            latitude, longitude = future.result()
+        except Exception as e:
+            print(f"Error processing {location}: {e}")
+            latitude, longitude = None, None
+
+        new_row = [latitude, longitude] + row
+        if self.debug:
+            print(f"{hospital_num}, {history_num}: {new_row}")
+        return new_row
+
+    def _resume(self, part_filepath: str) -> set:
+        """
+        Reads the rows saved to the partial output file by an interrupted run.
+        An incomplete last line is cut off the file.
+
+        :param part_filepath: Path to the partial output file.
+        :return: set of (hospital_num, history_num) of the saved rows.
+        """
+        if not os.path.exists(part_filepath):
+            return set()
+
+        with open(part_filepath, mode='rb+') as part_file:
+            size = part_file.seek(0, os.SEEK_END)
+            part_file.seek(max(0, size - (1 << 20)))
+            tail = part_file.read()
+            part_file.truncate(size - len(tail) + tail.rfind(b'\n') + 1)
+
+        with open(part_filepath, mode='r', newline='', encoding=self.encoding,
+                  errors='replace', buffering=1 << 20) as part_file:
+            reader = csv.reader(part_file, delimiter=';')
+            next(reader, None)  # Skip header
+            return {(row[2], row[3]) for row in reader}
+
+    @staticmethod
+    def _save(writer, output_file, rows: list):
+        """
+        Writes the rows and forces them to the disk, so they survive a crash of the run.
+
+        :param writer: CSV writer of the output file.
+        :param output_file: The output file.
+        :param rows: Rows to write. The list is cleared afterwards.
+        :return: None
+        """
+        writer.writerows(rows)
+        output_file.flush()
+        os.fsync(output_file.fileno())
+        rows.clear()
 
     def add_coordinates_and_save(self, max_workers=5):
         """
         Reads the data from the CSV file, adds coordinates to each location in parallel,
         and writes the data with coordinates to a new CSV file.
+
+        The rows are streamed: at most `max_workers * 4` rows wait for their coordinates, and
+        the rows are written in the input order. Every unique address is geocoded only once,
+        rows with a repeated address share the request of its first occurrence.
+
+        The rows are saved to `<output file>.part` in batches of 256, which is renamed to
+        the output file when all rows are done. If the run is interrupted, the next run resumes
+        it: the rows already saved to the partial file (by `hospital_num` and `history_num`)
+        are skipped. The progress bar is updated once per saved batch, and the rows are printed
+        only in debug mode.
+
+        The files are read and written in `self.encoding` (Windows-1251 by default); undecodable
+        bytes are replaced instead of aborting the run.
         """
-        with (open(self.input_filepath, mode='r', encoding='ANSI') as input_file,
-              open(self.output_filepath, mode='w', newline='', encoding='ANSI') as output_file):
+        self._mount_pool(pool_size=max_workers)   # One pooled connection per worker
+        part_filepath = self.output_filepath + ".part"
+        processed = self._resume(part_filepath)
+        with (open(self.input_filepath, mode='r', encoding=self.encoding, errors='replace',
+                   buffering=1 << 20) as input_file,
+              open(part_filepath, mode='a', newline='', encoding=self.encoding,
+                   errors='ignore', buffering=1 << 20) as output_file):
             reader = csv.reader(input_file, delimiter=';')
             writer = csv.writer(output_file, delimiter=';')
 
             header = next(reader)
-            writer.writerow(["latitude", "longitude"] + header)
+            if output_file.tell() == 0:
+                writer.writerow(["latitude", "longitude"] + header)
 
-            rows = list(reader)
-            addresses = [row[2] for row in rows]  # Третий столбец — это адрес
+            pending = deque()   # (row, future) pairs in the input order
+            futures = {}        # normalized address -> future of its coordinates
+            batch = []
+            try:
+                with (ThreadPoolExecutor(max_workers=max_workers) as executor,
+                      tqdm(desc="Fetching coordinates", unit=" row",
+                           initial=len(processed)) as pbar):
+                    for row in reader:
+                        if (row[0], row[1]) in processed:
+                            continue  # Saved by the interrupted run
 
-            results = {}
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_row = {executor.submit(self.get_coordinates, addr): row for row, addr in
-                                 zip(rows, addresses)}
+                        pending.append((row, self._submit(executor, futures, row[2])))
+                        if len(pending) < max_workers * 4:
+                            continue
 
-                with tqdm(total=len(rows), desc="Fetching coordinates", unit=" row") as pbar:
-                    for future in as_completed(future_to_row):
-                        row = future_to_row[future]
-                        hospital_num, history_num, location, *_ = row
-                        try:
-                            latitude, longitude = future.result()
-                        except Exception as e:
-                            print(f"Error processing {location}: {e}")
-                            latitude, longitude = None, None
+                        batch.append(self._complete(*pending.popleft()))
+                        if len(batch) >= 256:
+                            pbar.update(len(batch))
+                            self._save(writer, output_file, batch)
 
-                        new_row = [latitude, longitude] + row
-                        writer.writerow(new_row)
-                        print(f"{hospital_num}, {history_num}: {new_row}")
-                        pbar.update(1)
+                    while pending:
+                        batch.append(self._complete(*pending.popleft()))
+
+                    pbar.update(len(batch))
+                    self._save(writer, output_file, batch)
+            finally:
+                self.cache.flush()
+
+        os.replace(part_filepath, self.output_filepath)
 
 
 class GeoCheckOSMMulti(CoordinatesAdderMultiWorker):
@@ -76,19 +265,20 @@ class GeoCheckOSMMulti(CoordinatesAdderMultiWorker):
     The class will use the Photon API (OpenStreetMap) to obtain coordinates for the addresses.
     """
 
-    def __init__(self, input_filepath: str, output_filepath: str):
+    def __init__(self, input_filepath: str, output_filepath: str, cache_filepath: str = None):
         """
         :param input_filepath: Path to the CSV file containing the data.
         :param output_filepath: Path to the output CSV file where the data
                                 with coordinates will be saved.
+        :param cache_filepath: Path to the SQLite file with already geocoded addresses.
         """
-        super().__init__(input_filepath, output_filepath)
+        super().__init__(input_filepath, output_filepath, cache_filepath)
 
-    def get_coordinates(self, address: str) -> (float, float):
+    def _fetch(self, address: str) -> (float, float):
         url = "https://www.ideeslibres.org/GeoCheck/geocoder.php"
         params = {"q": address, "geocoder": "photon"}
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             if data:
@@ -97,4 +287,5 @@ class GeoCheckOSMMulti(CoordinatesAdderMultiWorker):
                 return latitude, longitude
         except requests.RequestException as e:
             print(f"Error fetching {address}: {e}")
+            return None
         return None, None
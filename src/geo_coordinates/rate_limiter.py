@@ -0,0 +1,42 @@
+"""
+Module for limiting the rate of requests to geocoding services.
+
+Classes:
+    :RateLimiter: Thread-safe limiter spacing requests to at most `rate` per second.
+
+Dependencies:
+    :threading: For sharing the limiter between worker threads.
+    :time: For measuring and waiting out the intervals between requests.
+"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing requests to at most `rate` per second.
+
+    Only the calls of `acquire` are paced, so the limiter should be acquired right before
+    the actual HTTP request: cache hits and skipped requests never wait.
+    """
+
+    def __init__(self, rate: float):
+        """
+        :param rate: Maximum number of requests per second.
+        """
+        self.interval = 1.0 / rate
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until the next request is allowed by the rate.
+
+        :return: None
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next_allowed - now)
+            self._next_allowed = max(now, self._next_allowed) + self.interval
+        time.sleep(wait)
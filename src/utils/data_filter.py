@@ -6,16 +6,27 @@ Provides abstract and concrete implementations for filtering data from CSV files
 Classes:
     :DataFilter: Abstract base class for data filter implementations.
     :SkipFilter: A utility class for reading and filtering incorrect data from a CSV file.
+    :PandasFilter: SkipFilter counterpart parsing the CSV file with pandas and pyarrow.
+    :MmapFilter: SkipFilter counterpart scanning the raw lines of the memory-mapped file.
 
 Dependencies:
     :csv: for reading and writing CSV files.
-    :re: for regular expression operations used in data parsing.
+    :mmap: for scanning the input file without copying it into Python objects.
+    :concurrent.futures: for filtering parts of the input file in several processes.
+    :src.utils.measurements: for the delimiters and the checks of the weight and height fields.
     :abc: for abstract base class support.
+    :pandas: for parsing large CSV files with pyarrow.
 """
 
 import csv
-import re
+import mmap
+import os
+import shutil
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import pandas as pd
+from src.utils.measurements import DELIMITERS_RE, uniform_len, split_components, valid_components
 
 
 class DataFilter(ABC):
@@ -31,6 +42,7 @@ class DataFilter(ABC):
         """
         self.input_filepath = input_filepath
         self.output_filepath = output_filepath
+        self.encoding = "cp1251"    # Encoding of the input and output CSV files.
         self.debug = False
 
     @abstractmethod
@@ -72,43 +84,246 @@ class SkipFilter(DataFilter):
         """
         try:
             # Open the input file for reading and the output file for writing
-            with (open(self.input_filepath, mode='r', encoding='ANSI') as input_file, \
-                  open(self.output_filepath, mode='w', newline='', encoding='ANSI')
-                  as output_file):
+            with (open(self.input_filepath, mode='r', encoding=self.encoding,
+                       buffering=1 << 20) as input_file, \
+                  open(self.output_filepath, mode='w', newline='', encoding=self.encoding,
+                       buffering=1 << 20) as output_file):
 
-                reader = csv.reader(input_file, delimiter=';')
                 writer = csv.writer(output_file, delimiter=';')
 
                 # Read the header and write it to the output file
-                header = next(reader)
-                writer.writerow(header)
+                writer.writerow(next(csv.reader(input_file, delimiter=';')))
+
+                # Local names skip the attribute lookups in the loop
+                split, strip = DELIMITERS_RE.split, str.strip
+                batch = []  # Valid rows waiting to be written
+                for line in input_file:
+                    if '"' in line:
+                        # Quoted fields may contain separators and line breaks, parse them as CSV
+                        row = next(csv.reader(chain([line], input_file), delimiter=';'))
+                    else:
+                        # Plain lines are split only if they have the right number of separators
+                        row = line.rstrip('\n').split(';') if line.count(';') == 78 else []
 
-                for row in reader:
                     if len(row) != 79:
                         if self.debug:
-                            print(f"Not enough data in row: {row}")
+                            print(f"Not enough data in row: {row or line.rstrip()}")
                         continue  # Skip rows with incorrect number of columns
 
                     _, _, location, child_weight, child_height, *_ = row
 
                     # Split values by the specified delimiters and remove leading/trailing spaces
-                    child_weight_parts = [part.strip() for part in
-                                          re.split(r"[,/\.]", child_weight)]
-                    child_height_parts = [part.strip() for part in
-                                          re.split(r"[,/\.]", child_height)]
+                    child_weight_parts = list(map(strip, split(child_weight)))
+                    child_height_parts = list(map(strip, split(child_height)))
 
                     # Check that the number of components between fields is the same and that all
                     # components within a field have the same length
                     if len(child_weight_parts) != len(child_height_parts) or \
-                            len(set(map(len, child_weight_parts))) != 1 or \
-                            len(set(map(len, child_height_parts))) != 1 or \
-                            len(child_weight_parts[0]) == 0 or len(str(location)) == 0:
+                            not uniform_len(child_weight_parts) or \
+                            not uniform_len(child_height_parts) or \
+                            not child_weight_parts[0] or not location:
                         if self.debug:
                             print(f"Invalid data in row: {row}")
                         continue  # Skip the row if conditions are not met
 
-                    # Write the valid row to the output file
-                    writer.writerow(row)
+                    # Write the valid rows to the output file in batches
+                    batch.append(row)
+                    if len(batch) >= 4096:
+                        writer.writerows(batch)
+                        batch.clear()
+
+                writer.writerows(batch)
+
+        except FileNotFoundError:
+            raise
+        except (ValueError, csv.Error) as e:
+            raise ValueError(f"Data format error in {self.input_filepath}: {e}") from e
+        except OSError as e:
+            raise OSError(f"File system error accessing {self.input_filepath}: {e}") from e
+
+
+class PandasFilter(SkipFilter):
+    """
+    SkipFilter counterpart parsing the CSV file with pandas and pyarrow.
+
+    The filtering criteria are the same as in SkipFilter, but the whole file is parsed into
+    a DataFrame at once with the pyarrow parser, which is much faster than `csv.reader` on large
+    files, and the criteria are checked with vectorized string operations on whole columns.
+    """
+
+    def filter(self):
+        """
+        Reads the CSV file, filters rows based on specific conditions,
+        and writes the filtered data into a new CSV file.
+
+        :return: None
+        :raises FileNotFoundError, ValueError, OSError: if any error occurs during
+                file reading or writing.
+        """
+        try:
+            # Rows with a wrong number of columns are dropped (and reported in debug mode)
+            # by the pyarrow parser, which unlike the C parser does not pad short rows
+            df = pd.read_csv(self.input_filepath, sep=';', encoding=self.encoding, dtype=str,
+                             engine='pyarrow', keep_default_na=False,
+                             on_bad_lines='warn' if self.debug else 'skip')
+
+            mask = valid_components(df.iloc[:, 2], split_components(df.iloc[:, 3]),
+                                    split_components(df.iloc[:, 4]))
+            if self.debug:
+                for row in df[~mask].itertuples(index=False):
+                    print(f"Invalid data in row: {list(row)}")
+
+            df[mask].to_csv(self.output_filepath, sep=';', encoding=self.encoding, index=False,
+                            lineterminator='\r\n')
+
+        except FileNotFoundError:
+            raise
+        except ValueError as e:
+            raise ValueError(f"Data format error in {self.input_filepath}: {e}") from e
+        except OSError as e:
+            raise OSError(f"File system error accessing {self.input_filepath}: {e}") from e
+
+
+class MmapFilter(SkipFilter):
+    """
+    SkipFilter counterpart scanning the raw lines of the memory-mapped file.
+
+    The filtering criteria are the same as in SkipFilter, but the lines are not parsed as CSV:
+    the number of columns is checked by counting the separators, only the fields needed for
+    the criteria are decoded, and the kept lines are copied to the output byte for byte
+    (with the original quoting and line endings). Lines with quoted fields are parsed with
+    the csv module. Every record must fit on one line.
+
+    With `processes` above 1 the file is split into that many ranges of whole lines, which
+    are filtered in separate processes into temporary files next to the output file and then
+    concatenated in order.
+    """
+
+    def __init__(self, input_filepath: str, output_filepath: str):
+        """
+        :param input_filepath: Path to data source file.
+        :param output_filepath: Path to the output CSV file where filtered data
+                                will be saved.
+        """
+        super().__init__(input_filepath, output_filepath)
+        self.processes = 1          # Number of processes filtering the file.
+
+    def _is_valid(self, line: bytes) -> bool:
+        """
+        Checks the raw line against the filtering criteria.
+
+        :param line: Line of the input file.
+        :return: True if the line should be kept, otherwise False.
+        """
+        if b'"' in line:
+            # Separators may be quoted, so count the columns of the parsed row
+            row = next(csv.reader([line.decode(self.encoding)], delimiter=';'), [])
+            if len(row) != 79:
+                return False
+            location, child_weight, child_height = row[2:5]
+        else:
+            if line.count(b';') != 78:
+                return False
+            location, child_weight, child_height = \
+                (field.decode(self.encoding) for field in line.split(b';', 5)[2:5])
+
+        # Split values by the specified delimiters and remove leading/trailing spaces
+        child_weight_parts = [part.strip() for part in DELIMITERS_RE.split(child_weight)]
+        child_height_parts = [part.strip() for part in DELIMITERS_RE.split(child_height)]
+
+        return len(child_weight_parts) == len(child_height_parts) and \
+            uniform_len(child_weight_parts) and uniform_len(child_height_parts) and \
+            bool(child_weight_parts[0]) and bool(location)
+
+    def _scan(self, data: mmap.mmap, start: int, end: int, write):
+        """
+        Writes the valid lines of the range of the file.
+
+        :param data: The memory-mapped input file.
+        :param start: Offset of the first line of the range.
+        :param end: Offset right after the last line of the range.
+        :param write: Function writing a kept line.
+        :return: None
+        """
+        while start < end:
+            line_end = data.find(b'\n', start, end) + 1 or end
+            line = data[start:line_end]
+            start = line_end
+
+            if self._is_valid(line):
+                write(line)
+            elif self.debug:
+                print(f"Invalid data in row: {line.decode(self.encoding).rstrip()}")
+
+    def _filter_range(self, start: int, end: int, output_filepath: str):
+        """
+        Writes the valid lines of the range of the file into a separate file.
+        Runs in a worker process.
+
+        :param start: Offset of the first line of the range.
+        :param end: Offset right after the last line of the range.
+        :param output_filepath: Path to the file for the kept lines.
+        :return: None
+        """
+        with (open(self.input_filepath, mode='rb') as input_file,
+              mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+              open(output_filepath, mode='wb', buffering=1 << 20) as output_file):
+            self._scan(data, start, end, output_file.write)
+
+    def _filter_parallel(self, data: mmap.mmap, start: int, output_file):
+        """
+        Filters the lines after the offset in `self.processes` worker processes
+        and appends the kept lines to the output file in the input order.
+
+        :param data: The memory-mapped input file.
+        :param start: Offset of the first line to filter.
+        :param output_file: The output file.
+        :return: None
+        """
+        size = len(data)
+
+        # Split the lines into ranges of about the same size
+        bounds = [start]
+        for i in range(1, self.processes):
+            bounds.append(max(bounds[-1], data.find(b'\n', start + (size - start) * i
+                                                    // self.processes) + 1 or size))
+        bounds.append(size)
+
+        part_filepaths = [f"{self.output_filepath}.{i}.part" for i in range(self.processes)]
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                list(executor.map(self._filter_range, bounds[:-1], bounds[1:], part_filepaths))
+
+            for part_filepath in part_filepaths:
+                with open(part_filepath, mode='rb') as part_file:
+                    shutil.copyfileobj(part_file, output_file, 1 << 20)
+        finally:
+            for part_filepath in part_filepaths:
+                if os.path.exists(part_filepath):
+                    os.remove(part_filepath)
+
+    def filter(self):
+        """
+        Reads the CSV file, filters rows based on specific conditions,
+        and writes the filtered data into a new CSV file.
+
+        :return: None
+        :raises FileNotFoundError, ValueError, csv.Error, OSError: if any error occurs during
+                file reading or writing.
+        """
+        try:
+            with (open(self.input_filepath, mode='rb') as input_file,
+                  mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+                  open(self.output_filepath, mode='wb', buffering=1 << 20) as output_file):
+
+                # Copy the header to the output file
+                start = data.find(b'\n') + 1 or len(data)
+                output_file.write(data[:start])
+
+                if self.processes > 1:
+                    self._filter_parallel(data, start, output_file)
+                else:
+                    self._scan(data, start, len(data), output_file.write)
 
         except FileNotFoundError:
             raise
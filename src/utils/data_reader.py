@@ -7,16 +7,22 @@ parsing annotation data from various sources.
 Classes:
     :DataReader: Abstract base class for data reading implementations.
     :CsvReader: CSV parser for reading and parsing data from a CSV file.
+    :PandasReader: CSV parser returning the parsed data as a pandas DataFrame.
 
 Dependencies:
     :csv: for reading CSV files.
-    :re: for regular expression operations used in data parsing.
+    :src.utils.measurements: for the delimiters and the checks of the weight and height fields.
     :abc: for abstract base class support.
+    :pandas: for parsing CSV files in bulk with pyarrow.
 """
 
 import csv
-import re
 from abc import ABC, abstractmethod
+import pandas as pd
+from src.utils.measurements import DELIMITERS_RE, uniform_len, split_components, valid_components
+
+# Values of the risk factor fields meaning presence (compared in lowercase without spaces)
+_TRUE = frozenset({"1", "true", "yes", "y", "t", "истина"})
 
 
 class DataReader(ABC):
@@ -29,6 +35,7 @@ class DataReader(ABC):
         :param filepath: Path to data source file.
         """
         self.file_path = filepath
+        self.encoding = "cp1251"    # Encoding of the data source file.
 
     @abstractmethod
     def read(self):
@@ -47,6 +54,13 @@ class CsvReader(DataReader):
     - `child_height` (int): The height of the child in centimeters.
     - [list of risk factors] (list[bool]): A list of boolean values indicating
       the presence (True) or absence (False) of various risk factors.
+
+    Risk factor fields holding `1` (or `true`, `yes`, ...) are parsed as True, any other value
+    including `0` and an empty field is parsed as False.
+
+    By default, rows not meeting the SkipFilter criteria or holding non-numeric identifiers
+    or measurements are reported as errors. With `strict` set to False they are skipped instead,
+    so the raw data can be read in a single pass without writing the filtered file first.
     """
 
     def __init__(self, filepath: str):
@@ -55,6 +69,7 @@ class CsvReader(DataReader):
         """
         super().__init__(filepath)
         self.add_header = False      # Whether to include the header row in the output.
+        self.strict = True           # Whether to raise on incorrect rows instead of skipping them.
 
     def read(self):
         """
@@ -64,44 +79,62 @@ class CsvReader(DataReader):
         :raises FileNotFoundError, ValueError, csv.Error, OSError: if any error occurs during
                 file reading or parsing.
         """
-        parsed_data = []
+        return list(self.iter_rows())
+
+    def iter_rows(self):
+        """
+        Lazily parses the CSV file, skipping the header row. Unlike `read`, the parsed rows
+        are not collected in memory.
+
+        :return: generator of tuples containing parsed data by rows.
+        :raises FileNotFoundError, ValueError, csv.Error, OSError: if any error occurs during
+                file reading or parsing, or if a row is incorrect in strict mode.
+        """
         try:
-            with (open(self.file_path, mode='r', encoding='ANSI') as file):
+            with open(self.file_path, mode='r', encoding=self.encoding,
+                      buffering=1 << 20) as file:
                 reader = csv.reader(file, delimiter=';')
                 if not self.add_header:
                     next(reader, [])  # Skip header
 
+                # Local names skip the attribute lookups in the loop
+                split, strip = DELIMITERS_RE.split, str.strip
                 for row in reader:
                     if len(row) != 79:
+                        if not self.strict:
+                            continue
                         raise ValueError(f"Incorrect line in the file {self.file_path}: {row}")
 
                     hospital_num, history_num, location, child_weight, child_height, *risk_factors = row
 
                     # Split by any of the specified delimiters
-                    child_weight_parts = [part.strip() for part in
-                                          re.split(r"[,/\.]", child_weight)]
-                    child_height_parts = [part.strip() for part in
-                                          re.split(r"[,/\.]", child_height)]
+                    child_weight_parts = list(map(strip, split(child_weight)))
+                    child_height_parts = list(map(strip, split(child_height)))
 
                     # Check that the number of components between fields is the same and that all
                     # components within a field have the same length
                     if len(child_weight_parts) != len(child_height_parts) or \
-                            len(set(map(len, child_weight_parts))) != 1 or \
-                            len(set(map(len, child_height_parts))) != 1 or \
-                            len(child_weight_parts[0]) == 0 or len(str(location)) == 0:
+                            not uniform_len(child_weight_parts) or \
+                            not uniform_len(child_height_parts) or \
+                            not child_weight_parts[0] or not location:
+                        if not self.strict:
+                            continue
                         raise ValueError(f"Incorrect line in the file {self.file_path}: {row}")
 
+                    try:
+                        # The identifiers and risk factors are the same for every pair of values
+                        identifiers = (int(hospital_num), int(history_num), location)
+                        measurements = [(int(weight), int(height)) for weight, height
+                                        in zip(child_weight_parts, child_height_parts)]
+                    except ValueError:
+                        if not self.strict:
+                            continue
+                        raise
+                    risks = tuple(data.strip().lower() in _TRUE for data in risk_factors)
+
                     # Process each pair of values
-                    for i in range(len(child_height_parts)):
-                        row_data = (
-                            int(hospital_num),
-                            int(history_num),
-                            str(location),
-                            int(child_weight_parts[i]),
-                            int(child_height_parts[i]),
-                            *[bool(data) for data in risk_factors]
-                        )
-                        parsed_data.append(row_data)
+                    for measurement in measurements:
+                        yield identifiers + measurement + risks
 
         except FileNotFoundError:
             raise
@@ -110,4 +143,60 @@ class CsvReader(DataReader):
         except OSError as e:
             raise OSError(f"File system error accessing {self.file_path}: {e}") from e
 
-        return parsed_data
+
+class PandasReader(DataReader):
+    """
+    CSV parser returning the parsed data as a pandas DataFrame.
+
+    The input format and the validation are the same as in CsvReader, and the DataFrame
+    holds the same rows as the tuples returned by `CsvReader.read`. The file is parsed with
+    the pyarrow parser and the fields are converted column by column: the numbers are stored
+    as the smallest fitting unsigned integers and the risk factors as booleans, instead of
+    a Python object per value.
+    """
+
+    def read(self):
+        """
+        Parses the CSV file.
+
+        :return: DataFrame with a row per pair of weight and height values.
+        :raises FileNotFoundError, ValueError, OSError: if any error occurs during
+                file reading or parsing.
+        """
+        try:
+            # Unlike the C parser, the pyarrow parser reports short rows instead of padding them
+            df = pd.read_csv(self.file_path, sep=';', encoding=self.encoding, dtype=str,
+                             engine='pyarrow', keep_default_na=False)
+            if df.shape[1] != 79:
+                raise ValueError(f"Incorrect number of columns in the file {self.file_path}")
+
+            # Split by any of the specified delimiters, one component per line
+            weights = split_components(df.iloc[:, 3])
+            heights = split_components(df.iloc[:, 4])
+
+            invalid = ~valid_components(df.iloc[:, 2], weights, heights)
+            if invalid.any():
+                row = df[invalid].iloc[0].tolist()
+                raise ValueError(f"Incorrect line in the file {self.file_path}: {row}")
+
+            # Repeat every row for each pair of values
+            rows = df.loc[weights.index]
+            risk_factors = rows.iloc[:, 5:]
+            parsed_data = pd.DataFrame({
+                "hospital_num": pd.to_numeric(rows.iloc[:, 0], downcast="unsigned"),
+                "history_num": pd.to_numeric(rows.iloc[:, 1], downcast="unsigned"),
+                "location": rows.iloc[:, 2],
+                "child_weight": pd.to_numeric(weights, downcast="unsigned"),
+                "child_height": pd.to_numeric(heights, downcast="unsigned"),
+                **{name: risk_factors[name].str.strip().str.lower().isin(_TRUE)
+                   for name in risk_factors.columns}
+            })
+
+        except FileNotFoundError:
+            raise
+        except ValueError as e:
+            raise ValueError(f"Data format error in {self.file_path}: {e}") from e
+        except OSError as e:
+            raise OSError(f"File system error accessing {self.file_path}: {e}") from e
+
+        return parsed_data.reset_index(drop=True)
@@ -0,0 +1,61 @@
+"""
+Module with the checks of the weight and height fields shared by the data filters and readers.
+
+A field may hold several measurements (e.g. of twins) separated by `,`, `/` or `.`. A row is
+valid if both fields hold the same number of components, all components of a field have
+the same length, the weight is not empty and the location is not empty.
+
+Functions:
+    :uniform_len: Checks that all components of a field have the same length.
+    :split_components: Splits a whole column of fields into components (pandas).
+    :valid_components: Checks whole columns of rows against the criteria (pandas).
+
+Dependencies:
+    :re: for splitting the fields by the delimiters.
+"""
+
+import re
+
+# Delimiters between the components of the weight and height fields
+DELIMITERS_RE = re.compile(r"[,/.]")
+
+
+def uniform_len(parts: list) -> bool:
+    """
+    Checks that all strings in the list have the same length.
+
+    :param parts: Non-empty list of strings.
+    :return: True if the lengths are equal, otherwise False.
+    """
+    first = len(parts[0])
+    return all(len(part) == first for part in parts)
+
+
+def split_components(column):
+    """
+    Splits the values of the column by the delimiters and removes leading/trailing spaces.
+
+    :param column: pandas Series of strings.
+    :return: pandas Series with a component per line, indexed like the column
+             (the index of a value is repeated for each of its components).
+    """
+    return column.str.split(DELIMITERS_RE).explode().str.strip()
+
+
+def valid_components(locations, weights, heights):
+    """
+    Checks all rows at once against the criteria.
+
+    :param locations: pandas Series of the locations of the rows.
+    :param weights: Weight components of the rows as returned by `split_components`.
+    :param heights: Height components of the rows as returned by `split_components`.
+    :return: boolean pandas Series indexed like the rows, True for the valid ones.
+    """
+    weight = weights.str.len().groupby(level=0).agg(["count", "min", "max"])
+    height = heights.str.len().groupby(level=0).agg(["count", "min", "max"])
+
+    # Check that the number of components between fields is the same and that all
+    # components within a field have the same length
+    return (weight["count"] == height["count"]) & \
+        (weight["min"] == weight["max"]) & (height["min"] == height["max"]) & \
+        (weight["min"] > 0) & (locations.str.len() > 0)